@@ -1,5 +1,14 @@
+import collections
+import functools
+import math
+import mmap
+import os
+import queue
+import struct
+import sys
 import threading
 import time
+from array import array
 from dataclasses import dataclass
 from typing import List, Optional
 
@@ -7,21 +16,53 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 
 import json
-import platform
-import pyautogui
 from pynput import mouse, keyboard
 
+try:
+    import orjson  # optional: much faster save/load for large macros
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack  # optional: compact binary macro files (.mpk)
+except ImportError:
+    msgpack = None
+
 # ==============================
 # Configuration
 # ==============================
 
 DEFAULT_SPEED = 1.3          # Default playback speed (1.0 = real-time)
 DEFAULT_LOOP_COUNT = 1       # Default loop count
-MIN_SLEEP_CHUNK = 0.02       # Chunk size for long waits (seconds)
-SMALL_WAIT_THRESHOLD = 0.2   # Below this, use single sleep
+SPIN_NS = 1_000_000          # Busy-wait the last part of each wait below this (ns)
+MAX_DELAY = 1_000_000.0      # Longest single wait played (seconds); longer ones are clamped
 
 WINDOW_TITLE = "Mouse/Keyboard Macro (Global Hotkeys, Editable Delays, JSON, Looping)"
-MACRO_FILE_VERSION = 3       # version for mixed mouse+keyboard events
+MACRO_FILE_VERSION = 4       # version 4: events as positional rows
+MSGPACK_EXT = ".mpk"         # extension of the binary MessagePack format
+BINARY_EXT = ".mcr"          # extension of the fixed-record binary format
+BINARY_FILE_VERSION = 6      # .mcr version 6: 17-byte records plus a key name table
+
+IS_WINDOWS = sys.platform == "win32"
+
+# With "Autosave while recording" checked, each event is also appended to a
+# private .mcr file here, to recover the recording if the program dies. The
+# file is deleted once the recording is finalized. Off by default, since it
+# puts every recorded keystroke on disk.
+AUTOSAVE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    if IS_WINDOWS
+    else os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"),
+    "simplemacro",
+)
+
+# Event kinds as stored in binary (.mcr) macro files
+KIND_CLICK = 0
+KIND_KEY_DOWN = 1
+KIND_KEY_UP = 2
+
+_TYPE_TO_KIND = {"mouse_click": KIND_CLICK, "key_down": KIND_KEY_DOWN, "key_up": KIND_KEY_UP}
+_KIND_TO_TYPE = {kind: ev_type for ev_type, kind in _TYPE_TO_KIND.items()}
 
 
 # ==============================
@@ -30,7 +71,7 @@ MACRO_FILE_VERSION = 3       # version for mixed mouse+keyboard events
 
 def set_dpi_aware() -> None:
     """Set process DPI awareness on Windows so coordinates match at scaled displays."""
-    if platform.system() != "Windows":
+    if not IS_WINDOWS:
         return
     try:
         import ctypes
@@ -50,11 +91,105 @@ def set_dpi_aware() -> None:
 set_dpi_aware()
 
 
+# ==============================
+# Playback backend (clicks, timer resolution)
+# ==============================
+
+if IS_WINDOWS:
+    import ctypes
+    from ctypes import wintypes
+
+    INPUT_MOUSE = 0
+    MOUSEEVENTF_MOVE = 0x0001
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    MOUSEEVENTF_VIRTUALDESK = 0x4000
+    MOUSEEVENTF_ABSOLUTE = 0x8000
+
+    SM_XVIRTUALSCREEN = 76
+    SM_YVIRTUALSCREEN = 77
+    SM_CXVIRTUALSCREEN = 78
+    SM_CYVIRTUALSCREEN = 79
+
+    class MOUSEINPUT(ctypes.Structure):
+        _fields_ = [
+            ("dx", wintypes.LONG),
+            ("dy", wintypes.LONG),
+            ("mouseData", wintypes.DWORD),
+            ("dwFlags", wintypes.DWORD),
+            ("time", wintypes.DWORD),
+            ("dwExtraInfo", ctypes.c_size_t),
+        ]
+
+    class _INPUTUNION(ctypes.Union):
+        _fields_ = [("mi", MOUSEINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _anonymous_ = ("u",)
+        _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+    _user32 = ctypes.windll.user32
+    _SIZEOF_INPUT = ctypes.sizeof(INPUT)
+
+    # Virtual desktop bounds, read once (after DPI awareness is set) so
+    # absolute coordinates also work on secondary monitors.
+    _SCREEN_LEFT = _user32.GetSystemMetrics(SM_XVIRTUALSCREEN)
+    _SCREEN_TOP = _user32.GetSystemMetrics(SM_YVIRTUALSCREEN)
+    _SCREEN_W = max(_user32.GetSystemMetrics(SM_CXVIRTUALSCREEN), 2)
+    _SCREEN_H = max(_user32.GetSystemMetrics(SM_CYVIRTUALSCREEN), 2)
+
+    def _compile_click(x: int, y: int):
+        """Build the INPUT array that moves to (x, y) and left-clicks."""
+        inputs = (INPUT * 3)()
+        move = inputs[0]
+        move.type = INPUT_MOUSE
+        move.mi.dx = round((x - _SCREEN_LEFT) * 65535 / (_SCREEN_W - 1))
+        move.mi.dy = round((y - _SCREEN_TOP) * 65535 / (_SCREEN_H - 1))
+        move.mi.dwFlags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+        inputs[1].type = INPUT_MOUSE
+        inputs[1].mi.dwFlags = MOUSEEVENTF_LEFTDOWN
+        inputs[2].type = INPUT_MOUSE
+        inputs[2].mi.dwFlags = MOUSEEVENTF_LEFTUP
+        return inputs
+
+    def _send_click(inputs) -> None:
+        """Send a click built by _compile_click with a single SendInput call."""
+        _user32.SendInput(3, inputs, _SIZEOF_INPUT)
+
+    _winmm = ctypes.windll.winmm
+
+    def _set_fine_timer(enabled: bool) -> None:
+        """Raise the scheduler tick to 1 ms during playback (default ~15.6 ms)."""
+        if enabled:
+            _winmm.timeBeginPeriod(1)
+        else:
+            _winmm.timeEndPeriod(1)
+
+else:
+    # Created on first use; on X11 this opens a display connection.
+    _mouse_controller: Optional[mouse.Controller] = None
+
+    def _compile_click(x: int, y: int):
+        """Nothing to precompute without SendInput; keep the coordinates."""
+        global _mouse_controller
+        if _mouse_controller is None:
+            _mouse_controller = mouse.Controller()
+        return (x, y)
+
+    def _send_click(pos) -> None:
+        """Move to pos and left-click."""
+        _mouse_controller.position = pos
+        _mouse_controller.click(mouse.Button.left, 1)
+
+    def _set_fine_timer(enabled: bool) -> None:
+        """Timer resolution is already fine-grained here."""
+
+
 # ==============================
 # Data model
 # ==============================
 
-@dataclass
+@dataclass(slots=True)
 class MacroEvent:
     """
     One event in the macro.
@@ -74,11 +209,17 @@ class MacroEvent:
 # Helpers for key encoding/decoding
 # ==============================
 
+# Built once at import: every special key and its stored name. Aliases are
+# included so older files using an alternative name still decode.
+_STR_TO_KEY = {f"Key.{name}": k for name, k in keyboard.Key.__members__.items()}
+_KEY_TO_STR = {k: f"Key.{k.name}" for k in keyboard.Key}
+
+
 def encode_key(k: keyboard.Key | keyboard.KeyCode) -> str:
     """Convert pynput key object to a string for JSON."""
     if isinstance(k, keyboard.Key):
         # special key
-        return f"Key.{k.name}"
+        return _KEY_TO_STR[k]
     if isinstance(k, keyboard.KeyCode):
         if k.char is not None:
             return k.char
@@ -89,15 +230,19 @@ def encode_key(k: keyboard.Key | keyboard.KeyCode) -> str:
     return str(k)
 
 
+@functools.lru_cache(maxsize=1024)
 def decode_key(s: str) -> keyboard.Key | keyboard.KeyCode | None:
-    """Convert stored string back to a pynput key, if possible."""
+    """
+    Convert stored string back to a pynput key, if possible.
+
+    Cached: a macro repeats the same few keys, and every play compiles them.
+    """
     # Special keys: "Key.ctrl", "Key.enter", etc.
+    key = _STR_TO_KEY.get(s)
+    if key is not None:
+        return key
     if s.startswith("Key."):
-        name = s[4:]
-        try:
-            return getattr(keyboard.Key, name)
-        except AttributeError:
-            return None
+        return None
 
     # Virtual key strings: "KeyCode.vk.13"
     if s.startswith("KeyCode.vk."):
@@ -114,6 +259,385 @@ def decode_key(s: str) -> keyboard.Key | keyboard.KeyCode | None:
     return None
 
 
+# ==============================
+# Macro file formats
+# ==============================
+
+def _event_rows(events: List[MacroEvent]) -> list:
+    """
+    Events as [type, delay_before, x, y, key] rows for saving.
+
+    Raises ValueError for a non-finite delay: orjson would write it as null
+    and the file could not be loaded again.
+    """
+    for idx, ev in enumerate(events):
+        if not math.isfinite(ev.delay_before):
+            raise ValueError(f"Event {idx + 1} has an invalid delay ({ev.delay_before}).")
+    return [(ev.type, ev.delay_before, ev.x, ev.y, ev.key) for ev in events]
+
+
+def write_json_macro(path: str, events: List[MacroEvent]) -> None:
+    """
+    Write events to a compact JSON macro file.
+
+    Each event is stored as a positional [type, delay_before, x, y, key]
+    row, so field names are not repeated per event.
+    """
+    data = {
+        "version": MACRO_FILE_VERSION,
+        "events": _event_rows(events),
+    }
+
+    # Encode in one shot and write once; json.dump would stream many small
+    # chunks through the incremental encoder.
+    if orjson is not None:
+        blob = orjson.dumps(data)
+    else:
+        blob = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(blob)
+
+
+def read_json_macro(path: str) -> List[MacroEvent]:
+    """Read events from a JSON macro file, raising ValueError on bad data."""
+    with open(path, "rb") as f:
+        blob = f.read()
+    data = orjson.loads(blob) if orjson is not None else json.loads(blob)
+
+    events_data = data.get("events")
+    if not isinstance(events_data, list):
+        raise ValueError("Invalid macro file format (missing 'events' list).")
+
+    if data.get("version", 1) >= 4:
+        return _events_from_rows(events_data)
+
+    # Versions 1-3 store one object per event
+    loaded_events: List[MacroEvent] = []
+    for idx, item in enumerate(events_data):
+        try:
+            ev = _make_event(
+                item.get("type", "mouse_click"),
+                item.get("delay_before", 0.0),
+                item.get("x"),
+                item.get("y"),
+                item.get("key"),
+            )
+        except Exception as inner_e:
+            raise ValueError(f"Invalid event at index {idx}: {inner_e}") from inner_e
+        if ev is not None:
+            loaded_events.append(ev)
+    return loaded_events
+
+
+def write_msgpack_macro(path: str, events: List[MacroEvent]) -> None:
+    """Write events to a MessagePack macro file, using the same rows as JSON."""
+    if msgpack is None:
+        raise RuntimeError("MessagePack support requires the 'msgpack' package.")
+    data = {
+        "version": MACRO_FILE_VERSION,
+        "events": _event_rows(events),
+    }
+    with open(path, "wb") as f:
+        f.write(msgpack.packb(data, use_bin_type=True))
+
+
+def read_msgpack_macro(path: str) -> List[MacroEvent]:
+    """Read events from a MessagePack macro file, raising ValueError on bad data."""
+    if msgpack is None:
+        raise RuntimeError("MessagePack support requires the 'msgpack' package.")
+    with open(path, "rb") as f:
+        data = msgpack.unpackb(f.read(), raw=False)
+
+    events_data = data.get("events") if isinstance(data, dict) else None
+    if not isinstance(events_data, list):
+        raise ValueError("Invalid macro file format (missing 'events' list).")
+    return _events_from_rows(events_data)
+
+
+# Binary .mcr layout: a 28-byte header (magic, format version, record count,
+# key count, key table offset), one 17-byte record per event, then the key
+# table. A record is kind, delay_before and two ints: x and y for a click, or
+# the key's index in the table for a key event. The table holds each distinct
+# key name once, as a length byte followed by UTF-8. Fixed-size records need
+# no parsing and no field names, and new events can be appended in place.
+_BINARY_MAGIC = b"MCR\0"
+_BINARY_HEADER = struct.Struct("<4sIQIQ")
+_BINARY_RECORD = struct.Struct("<Bdii")
+
+
+def _pack_key_entry(key: str) -> bytes:
+    """One key table entry: length byte plus UTF-8 name."""
+    raw = key.encode("utf-8")
+    if len(raw) > 255:
+        raise ValueError(f"Key name too long for binary format: {key!r}")
+    return bytes((len(raw),)) + raw
+
+
+def _pack_record(buf, offset: int, ev: MacroEvent, key_index: int) -> None:
+    """Pack one event into buf at offset; key_index is used for key events."""
+    if not math.isfinite(ev.delay_before):
+        raise ValueError(f"Invalid delay for binary format: {ev.delay_before}")
+    if ev.type == "mouse_click":
+        a, b = ev.x or 0, ev.y or 0
+    else:
+        a, b = key_index, 0
+    _BINARY_RECORD.pack_into(buf, offset, _TYPE_TO_KIND[ev.type], ev.delay_before, a, b)
+
+
+def write_binary_macro(path: str, events: List[MacroEvent]) -> None:
+    """Write events to a fixed-record binary (.mcr) macro file."""
+    keys = {}  # key name -> table index, in order of first use
+    for ev in events:
+        if ev.type != "mouse_click":
+            keys.setdefault(ev.key or "", len(keys))
+    table = b"".join(_pack_key_entry(key) for key in keys)
+
+    size = _BINARY_RECORD.size
+    key_offset = _BINARY_HEADER.size + size * len(events)
+    buf = bytearray(key_offset + len(table))
+    _BINARY_HEADER.pack_into(
+        buf, 0, _BINARY_MAGIC, BINARY_FILE_VERSION, len(events), len(keys), key_offset
+    )
+    offset = _BINARY_HEADER.size
+    for ev in events:
+        _pack_record(buf, offset, ev, keys.get(ev.key or "", 0))
+        offset += size
+    buf[key_offset:] = table
+    with open(path, "wb") as f:
+        f.write(buf)
+
+
+def read_binary_macro(path: str) -> List[MacroEvent]:
+    """
+    Read events from a fixed-record binary (.mcr) macro file.
+
+    The file is memory-mapped and records are unpacked straight from the
+    mapping, without reading it into a separate buffer first.
+    """
+    header = _BINARY_HEADER
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < header.size:
+            raise ValueError("Invalid macro file format (not a binary macro).")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, count, key_count, key_offset = header.unpack_from(mm, 0)
+            if magic != _BINARY_MAGIC:
+                raise ValueError("Invalid macro file format (not a binary macro).")
+            if version != BINARY_FILE_VERSION:
+                raise ValueError(f"Unsupported binary macro version: {version}")
+            end = header.size + count * _BINARY_RECORD.size
+            if end > key_offset or key_offset > len(mm):
+                raise ValueError("Invalid macro file format (truncated record).")
+            keys = _read_key_table(mm, key_offset, key_count)
+            with memoryview(mm)[header.size:end] as body:
+                return _events_from_records(body, keys)
+
+
+def _read_key_table(mm, offset: int, key_count: int) -> List[str]:
+    """Read key_count length-prefixed key names starting at offset."""
+    keys = []
+    for _ in range(key_count):
+        if offset >= len(mm):
+            raise ValueError("Invalid macro file format (truncated key table).")
+        length = mm[offset]
+        name = mm[offset + 1:offset + 1 + length]
+        if len(name) != length:
+            raise ValueError("Invalid macro file format (truncated key table).")
+        keys.append(name.decode("utf-8"))
+        offset += 1 + length
+    return keys
+
+
+def _events_from_records(body, keys: List[str]) -> List[MacroEvent]:
+    """Build events from a buffer of packed binary records."""
+    loaded_events: List[MacroEvent] = []
+    for idx, (kind, delay, a, b) in enumerate(_BINARY_RECORD.iter_unpack(body)):
+        ev_type = _KIND_TO_TYPE.get(kind)
+        if ev_type is None:
+            raise ValueError(f"Invalid event at index {idx}: unknown kind {kind}")
+        try:
+            delay = _load_delay(delay)
+        except ValueError as inner_e:
+            raise ValueError(f"Invalid event at index {idx}: {inner_e}") from inner_e
+        if ev_type == "mouse_click":
+            loaded_events.append(MacroEvent(ev_type, delay, a, b, None))
+        elif 0 <= a < len(keys):
+            loaded_events.append(MacroEvent(ev_type, delay, None, None, keys[a]))
+        else:
+            raise ValueError(f"Invalid event at index {idx}: unknown key index {a}")
+    return loaded_events
+
+
+class BinaryMacroWriter:
+    """
+    Append-only writer for the binary (.mcr) format, backed by mmap.
+
+    Records grow forward from the header and the key table sits in reserved
+    space after them. Both are preallocated and doubled when full (moving
+    only the small key table), so appending an event is a pack into the
+    mapping plus a header update, independent of how many events were
+    written before. The header is written last, so the file is readable
+    with read_binary_macro at any time, even if the process dies
+    mid-recording.
+
+    path must not exist yet; it is created readable by the owner only.
+    """
+
+    def __init__(self, path: str, capacity: int = 1024, key_space: int = 256) -> None:
+        flags = (
+            os.O_RDWR | os.O_CREAT | os.O_EXCL
+            | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_BINARY", 0)
+        )
+        self.path = path
+        self._file = os.fdopen(os.open(path, flags, 0o600), "w+b")
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        self._capacity = 0
+        self._keys = {}  # key name -> table index
+        self._key_offset = _BINARY_HEADER.size
+        self._key_space = 0  # bytes reserved for the key table
+        self._key_used = 0
+        self._grow(capacity, key_space)
+
+    def _write_header(self) -> None:
+        _BINARY_HEADER.pack_into(
+            self._mm, 0, _BINARY_MAGIC, BINARY_FILE_VERSION,
+            self._count, len(self._keys), self._key_offset,
+        )
+
+    def _grow(self, capacity: int, key_space: int) -> None:
+        """Make room for capacity records and key_space bytes of key table."""
+        # The new table never overlaps the old one, which stays valid until
+        # the header points at the copy
+        offset = max(
+            _BINARY_HEADER.size + capacity * _BINARY_RECORD.size,
+            self._key_offset + self._key_space,
+        )
+        if self._mm is not None:
+            self._mm.close()
+        self._file.truncate(offset + key_space)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        if self._key_used:
+            self._mm.move(offset, self._key_offset, self._key_used)
+        self._capacity = (offset - _BINARY_HEADER.size) // _BINARY_RECORD.size
+        self._key_offset = offset
+        self._key_space = key_space
+        self._write_header()
+
+    def append(self, ev: MacroEvent) -> None:
+        """Append one event."""
+        key_index = 0
+        if ev.type != "mouse_click":
+            key = ev.key or ""
+            key_index = self._keys.get(key, -1)
+            if key_index < 0:
+                entry = _pack_key_entry(key)
+                if self._key_used + len(entry) > self._key_space:
+                    self._grow(self._capacity, max(self._key_space * 2, self._key_used + len(entry)))
+                start = self._key_offset + self._key_used
+                self._mm[start:start + len(entry)] = entry
+                self._key_used += len(entry)
+                key_index = self._keys[key] = len(self._keys)
+        if self._count == self._capacity:
+            self._grow(self._capacity * 2, self._key_space)
+        _pack_record(self._mm, _BINARY_HEADER.size + self._count * _BINARY_RECORD.size, ev, key_index)
+        self._count += 1
+        # Header last, so a reader never sees a half-written record or key
+        self._write_header()
+
+    def close(self) -> None:
+        """Move the key table up to the records, trim the file and close it."""
+        offset = _BINARY_HEADER.size + self._count * _BINARY_RECORD.size
+        self._mm.move(offset, self._key_offset, self._key_used)
+        self._key_offset = offset
+        self._write_header()
+        self._mm.close()
+        self._file.truncate(offset + self._key_used)
+        self._file.close()
+
+
+# Readers/writers by file extension; anything else is treated as JSON
+_MACRO_FORMATS = {
+    MSGPACK_EXT: (read_msgpack_macro, write_msgpack_macro),
+    BINARY_EXT: (read_binary_macro, write_binary_macro),
+}
+
+
+def _macro_format(path: str) -> tuple:
+    """(reader, writer) pair for a macro file path."""
+    for ext, funcs in _MACRO_FORMATS.items():
+        if path.lower().endswith(ext):
+            return funcs
+    return read_json_macro, write_json_macro
+
+
+def _events_from_rows(rows: list) -> List[MacroEvent]:
+    """Build events from [type, delay_before, x, y, key] rows."""
+    # Fast path: one dict lookup and one typed constructor call per row.
+    # Only when a row is malformed do we walk the rows again to report
+    # which one it was.
+    builders = _EVENT_BUILDERS
+    try:
+        return [builders[row[0]](*row) for row in rows if row[0] in builders]
+    except Exception:
+        pass
+
+    loaded_events: List[MacroEvent] = []
+    for idx, row in enumerate(rows):
+        try:
+            ev_type, delay, x, y, key = row
+            ev = _make_event(ev_type, delay, x, y, key)
+        except Exception as inner_e:
+            raise ValueError(f"Invalid event at index {idx}: {inner_e}") from inner_e
+        if ev is not None:
+            loaded_events.append(ev)
+    return loaded_events
+
+
+def _macro_filetypes() -> List[tuple]:
+    """File dialog filters, preferring MessagePack when it is available."""
+    json_type = ("JSON files", "*.json")
+    mpk_type = ("MessagePack files", f"*{MSGPACK_EXT}")
+    types = [mpk_type, json_type] if msgpack is not None else [json_type, mpk_type]
+    return types + [("Binary macro files", f"*{BINARY_EXT}"), ("All files", "*.*")]
+
+
+def _load_delay(delay) -> float:
+    """Validate a loaded delay_before: finite seconds, negative values become 0."""
+    delay = float(delay)
+    if not math.isfinite(delay):
+        raise ValueError(f"delay_before must be a finite number, not {delay}")
+    return max(0.0, delay)
+
+
+def _build_click(ev_type, delay, x, y, key) -> MacroEvent:
+    """Validate and build a loaded mouse_click event."""
+    return MacroEvent("mouse_click", _load_delay(delay), int(x), int(y), None)
+
+
+def _build_key(ev_type, delay, x, y, key) -> MacroEvent:
+    """Validate and build a loaded key_down/key_up event."""
+    if key is None:
+        raise KeyError("key")
+    return MacroEvent(ev_type, _load_delay(delay), None, None, str(key))
+
+
+# Loaded-event constructors by type, all taking (type, delay_before, x, y, key)
+_EVENT_BUILDERS = {
+    "mouse_click": _build_click,
+    "key_down": _build_key,
+    "key_up": _build_key,
+}
+
+
+def _make_event(ev_type, delay, x, y, key) -> Optional[MacroEvent]:
+    """Validate loaded fields and build a MacroEvent (None for unknown types)."""
+    builder = _EVENT_BUILDERS.get(ev_type)
+    if builder is None:
+        # Unknown type: skip
+        return None
+    return builder(ev_type, delay, x, y, key)
+
+
 # ==============================
 # GUI application
 # ==============================
@@ -142,20 +666,37 @@ class MouseKeyboardMacroGUI:
         # State
         self.is_recording: bool = False
         self.is_playing: bool = False
-        self.record_start_time: Optional[float] = None
-        self.last_event_time: Optional[float] = None
+        # Recording timestamps, integer time.monotonic_ns() values
+        self.record_start_ns: Optional[int] = None
+        self.last_event_ns: Optional[int] = None
         self.events: List[MacroEvent] = []
 
+        # Raw (timestamp_ns, type, payload) tuples from the listener callbacks,
+        # turned into events by the _record_worker thread. A new queue per
+        # recording, so a callback that puts after the stop sentinel cannot
+        # leak into the next recording.
+        self._raw_q: queue.SimpleQueue = queue.SimpleQueue()
+        # Set from start_recording until _finish_recording; events may change meanwhile
+        self._record_thread: Optional[threading.Thread] = None
+        self._autosave: Optional[BinaryMacroWriter] = None  # open while recording
+
+        # Listbox rows queued by the record worker, shown by _flush_ui
+        self._pending_ui: collections.deque = collections.deque()
+        self._flush_scheduled: bool = False
+
+        # Current state of the event buttons; they are created disabled
+        self._buttons_enabled: bool = False
+
         self.mouse_listener: Optional[mouse.Listener] = None
-        self.kb_record_listener: Optional[keyboard.Listener] = None  # for recording
-        self.kb_hotkey_listener: Optional[keyboard.Listener] = None  # for global hotkeys
+        self.kb_hotkey_listener: Optional[keyboard.Listener] = None  # hotkeys + key recording
 
-        self.stop_playback: bool = False  # Esc sets this during playback
+        self._cancel_event = threading.Event()  # Esc sets this during playback
         self.kb_controller = keyboard.Controller()
 
         self._build_ui()
         self._bind_close()
         self._start_hotkey_listener()  # global hotkeys
+        self._start_mouse_listener()  # clicks, only recorded while is_recording
 
     # ---------- UI setup ----------
 
@@ -237,6 +778,11 @@ class MouseKeyboardMacroGUI:
         self.loop_entry = tk.Entry(settings_frame, textvariable=self.loop_var, width=6)
         self.loop_entry.grid(row=0, column=3, padx=5, sticky="w")
 
+        self.autosave_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            settings_frame, text="Autosave while recording", variable=self.autosave_var
+        ).grid(row=0, column=4, padx=(15, 0), sticky="w")
+
         # Delay edit controls (set one)
         delay_frame = tk.Frame(self.root)
         delay_frame.pack(pady=5)
@@ -300,10 +846,26 @@ class MouseKeyboardMacroGUI:
     # ---------- Global hotkey listener (F9/F10/Esc) ----------
 
     def _start_hotkey_listener(self) -> None:
-        """Start global keyboard listener for F9/F10/Esc."""
+        """
+        Start the global keyboard listener.
+
+        One listener serves both F9/F10/Esc and key recording, so every
+        keystroke goes through a single OS hook. Hotkeys are never recorded.
+        """
+        hotkeys = (keyboard.Key.f9, keyboard.Key.f10, keyboard.Key.esc)
+        held = set()  # hotkeys currently down
 
         def on_press(key):
             try:
+                if key not in hotkeys:
+                    if self.is_recording:
+                        self._record_key_event("key_down", key)
+                    return
+                # A held key is auto-repeated by the OS; act on the first press only
+                if key in held:
+                    return
+                held.add(key)
+
                 if key == keyboard.Key.f9:
                     self.root.after(0, self.toggle_recording)
                 elif key == keyboard.Key.f10:
@@ -313,7 +875,15 @@ class MouseKeyboardMacroGUI:
             except Exception:
                 pass
 
-        self.kb_hotkey_listener = keyboard.Listener(on_press=on_press)
+        def on_release(key):
+            if key in hotkeys:
+                held.discard(key)
+            elif self.is_recording:
+                self._record_key_event("key_up", key)
+
+        self.kb_hotkey_listener = keyboard.Listener(
+            on_press=on_press, on_release=on_release, suppress=False
+        )
         self.kb_hotkey_listener.start()
 
     def _stop_hotkey_listener(self) -> None:
@@ -329,14 +899,13 @@ class MouseKeyboardMacroGUI:
     def on_close(self) -> None:
         """Clean up listeners and close the window."""
         self._stop_mouse_listener()
-        self._stop_kb_record_listener()
         self._stop_hotkey_listener()
         self.root.destroy()
 
     def on_esc(self, event=None) -> None:
         """Esc cancels recording or playback."""
         if self.is_playing:
-            self.stop_playback = True
+            self._cancel_event.set()
             self.update_status("Cancel requested...")
         if self.is_recording:
             self.stop_recording()
@@ -355,24 +924,36 @@ class MouseKeyboardMacroGUI:
         if self.is_playing:
             messagebox.showwarning("Busy", "Wait for playback to finish.")
             return
+        if self._record_thread is not None:
+            # Previous recording is still being finalized
+            return
 
+        self._raw_q = queue.SimpleQueue()
         self.is_recording = True
-        self.record_start_time = time.time()
-        self.last_event_time = None
+        self.record_start_ns = time.monotonic_ns()
+        self.last_event_ns = None
         self.events.clear()
         self.listbox.delete(0, tk.END)
         self.update_status("Recording...")
         self.record_button.config(text="Stop Recording (F9)")
 
-        self.play_button.config(state=tk.DISABLED)
-        self.clear_button.config(state=tk.DISABLED)
-        self.delete_selected_button.config(state=tk.DISABLED)
-        self.update_delay_button.config(state=tk.DISABLED)
-        self.add_delay_button.config(state=tk.DISABLED)
-        self.save_button.config(state=tk.DISABLED)
+        self._set_event_buttons(False)
+
+        self._pending_ui.clear()
 
-        self._start_mouse_listener()
-        self._start_kb_record_listener()
+        self._autosave = None
+        if self.autosave_var.get():
+            name = time.strftime("autosave-%Y%m%d-%H%M%S") + f"-{os.getpid()}{BINARY_EXT}"
+            try:
+                os.makedirs(AUTOSAVE_DIR, mode=0o700, exist_ok=True)
+                self._autosave = BinaryMacroWriter(os.path.join(AUTOSAVE_DIR, name))
+            except OSError:
+                pass  # recording works without it
+
+        self._record_thread = threading.Thread(
+            target=self._record_worker, args=(self._raw_q,), daemon=True
+        )
+        self._record_thread.start()
 
     def stop_recording(self) -> None:
         if not self.is_recording:
@@ -382,22 +963,44 @@ class MouseKeyboardMacroGUI:
         self.record_button.config(text="Start Recording (F9)")
         self.update_status("Idle")
 
-        self._stop_mouse_listener()
-        self._stop_kb_record_listener()
+        # The worker finishes the queued events, then calls _finish_recording
+        self._raw_q.put(None)
+
+    def _finish_recording(self) -> None:
+        """Finalize the event list once the record worker has drained."""
+        self._record_thread = None
+        self._pending_ui.clear()
 
         # Optional: remove the last event, which is often a stop action
         if self.events:
             self.events.pop()
 
+        self._discard_autosave()
+
         self._refresh_listbox()
         self._update_buttons_based_on_events()
 
+    def _discard_autosave(self) -> None:
+        """Close and delete the autosave file; self.events holds the recording."""
+        autosave, self._autosave = self._autosave, None
+        if autosave is None:
+            return
+        try:
+            autosave.close()
+        except OSError:
+            pass
+        try:
+            os.remove(autosave.path)
+        except OSError:
+            pass
+
     def _start_mouse_listener(self) -> None:
-        """Start global mouse listener for clicks."""
-        if self.mouse_listener is not None:
-            self.mouse_listener.stop()
-            self.mouse_listener = None
+        """
+        Start the global mouse listener for clicks.
 
+        It runs for the whole app lifetime; on_mouse_click ignores clicks
+        unless recording, so toggling recording does not re-install the hook.
+        """
         self.mouse_listener = mouse.Listener(on_click=self.on_mouse_click)
         self.mouse_listener.start()
 
@@ -410,127 +1013,110 @@ class MouseKeyboardMacroGUI:
                 pass
             self.mouse_listener = None
 
-    def _start_kb_record_listener(self) -> None:
-        """Start keyboard listener for recording key_down/key_up."""
-
-        def on_press(key):
-            if not self.is_recording:
-                return
-            # Ignore control hotkeys so they aren't recorded
-            if key in (keyboard.Key.f9, keyboard.Key.f10, keyboard.Key.esc):
-                return
-
-            self._record_key_event("key_down", key)
-
-        def on_release(key):
-            if not self.is_recording:
-                return
-            if key in (keyboard.Key.f9, keyboard.Key.f10, keyboard.Key.esc):
-                return
-
-            self._record_key_event("key_up", key)
-
-        if self.kb_record_listener is not None:
-            self.kb_record_listener.stop()
-            self.kb_record_listener = None
-
-        self.kb_record_listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-        self.kb_record_listener.start()
-
-    def _stop_kb_record_listener(self) -> None:
-        if self.kb_record_listener is not None:
-            try:
-                self.kb_record_listener.stop()
-            except Exception:
-                pass
-            self.kb_record_listener = None
-
-    def _get_delay(self) -> float:
-        """Compute delay since last event."""
-        now = time.time()
-        if self.last_event_time is None:
+    def _get_delay(self, now: int) -> float:
+        """Compute delay between the timestamp now and the last event."""
+        if self.last_event_ns is None:
             delay_before = 0.0
         else:
-            delay_before = now - self.last_event_time
-        self.last_event_time = now
+            delay_before = (now - self.last_event_ns) * 1e-9
+        self.last_event_ns = now
         return delay_before
 
     def on_mouse_click(self, x: int, y: int, button, pressed: bool) -> None:
         """pynput mouse callback used during recording."""
+        raw_q = self._raw_q  # before the check, so a late put stays in its own recording
         if not self.is_recording:
             return
         if button != mouse.Button.left or not pressed:
             return
-
-        pos_x, pos_y = pyautogui.position()
-        delay_before = self._get_delay()
-
-        ev = MacroEvent(
-            type="mouse_click",
-            delay_before=delay_before,
-            x=pos_x,
-            y=pos_y,
-            key=None,
-        )
-        self.events.append(ev)
-
-        index = len(self.events)
-        text = f"{index}: MOUSE click at ({pos_x}, {pos_y})  delay={delay_before:.3f}s"
-        self.root.after(0, lambda: self.listbox.insert(tk.END, text))
+        # Only timestamp here; the OS input hook waits for this callback.
+        # Monotonic, so a wall-clock adjustment mid-recording cannot produce
+        # a negative or inflated delay.
+        raw_q.put((time.monotonic_ns(), "mouse_click", (x, y)))
+
+    def _record_worker(self, raw_q: queue.SimpleQueue) -> None:
+        """Turn raw listener input into MacroEvents, off the listener threads."""
+        while True:
+            item = raw_q.get()
+            if item is None:
+                break
+            now, ev_type, payload = item
+            delay_before = self._get_delay(now)
+
+            if ev_type == "mouse_click":
+                # pynput already reports where the click happened; asking the
+                # OS for the cursor again would race with fast movement.
+                ev = MacroEvent(
+                    type="mouse_click",
+                    delay_before=delay_before,
+                    x=int(payload[0]),
+                    y=int(payload[1]),
+                    key=None,
+                )
+            else:
+                ev = MacroEvent(
+                    type=ev_type,
+                    delay_before=delay_before,
+                    x=None,
+                    y=None,
+                    key=encode_key(payload),
+                )
+            self.events.append(ev)
+            self._queue_listbox(self._format_row(len(self.events), ev))
+            if self._autosave is not None:
+                try:
+                    self._autosave.append(ev)
+                except (OSError, ValueError):
+                    # Key too long for a record, or disk trouble: a file with
+                    # a gap would not match self.events, so stop autosaving
+                    self._discard_autosave()
+
+        self.root.after(0, self._finish_recording)
+
+    def _queue_listbox(self, text: str) -> None:
+        """Queue a listbox row from the record worker; shown when Tk is idle."""
+        self._pending_ui.append(text)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after_idle(self._flush_ui)
+
+    def _flush_ui(self) -> None:
+        """Show all queued rows with one listbox insert."""
+        # Clear the flag before draining so a row queued meanwhile schedules
+        # another flush instead of waiting for the next event.
+        self._flush_scheduled = False
+        pending = self._pending_ui
+        items = [pending.popleft() for _ in range(len(pending))]
+        # Rows arriving after stop_recording are covered by the full refresh
+        # in _finish_recording
+        if items and self.is_recording:
+            self.listbox.insert(tk.END, *items)
 
     def _record_key_event(self, ev_type: str, key_obj) -> None:
         """Record a keyboard event (press or release)."""
+        raw_q = self._raw_q
         if not self.is_recording:
             return
-
-        delay_before = self._get_delay()
-        key_str = encode_key(key_obj)
-
-        ev = MacroEvent(
-            type=ev_type,
-            delay_before=delay_before,
-            x=None,
-            y=None,
-            key=key_str,
-        )
-        self.events.append(ev)
-
-        index = len(self.events)
-        text = f"{index}: {ev_type.upper()} {key_str}  delay={delay_before:.3f}s"
-        self.root.after(0, lambda: self.listbox.insert(tk.END, text))
+        raw_q.put((time.monotonic_ns(), ev_type, key_obj))
 
     # ---------- Playback ----------
 
     def play_macro(self) -> None:
-        if not self.events:
-            messagebox.showinfo("No macro", "There are no recorded events.")
-            return
         if self.is_recording:
             messagebox.showwarning("Busy", "Stop recording before playback.")
             return
+        if self._record_thread is not None:
+            # Recording is still being finalized
+            return
+        if not self.events:
+            messagebox.showinfo("No macro", "There are no recorded events.")
+            return
         if self.is_playing:
             return
 
-        self.is_playing = True
-        self.stop_playback = False
-        self.update_status("Playing macro...")
-
-        self.play_button.config(state=tk.DISABLED)
-        self.record_button.config(state=tk.DISABLED)
-        self.clear_button.config(state=tk.DISABLED)
-        self.delete_selected_button.config(state=tk.DISABLED)
-        self.update_delay_button.config(state=tk.DISABLED)
-        self.add_delay_button.config(state=tk.DISABLED)
-        self.save_button.config(state=tk.DISABLED)
-
-        thread = threading.Thread(target=self._play_macro_thread, daemon=True)
-        thread.start()
-
-    def _play_macro_thread(self) -> None:
-        """Run the playback in a background thread."""
         try:
             speed = float(self.speed_var.get())
-            if speed <= 0:
+            if not math.isfinite(speed) or speed <= 0:
                 speed = 1.0
         except Exception:
             speed = 1.0
@@ -542,60 +1128,128 @@ class MouseKeyboardMacroGUI:
         except Exception:
             loops = 1
 
-        if not self.events:
+        schedule = self._compile_schedule(speed)
+
+        self.is_playing = True
+        self._cancel_event.clear()
+        self.update_status("Playing macro...")
+
+        self.record_button.config(state=tk.DISABLED)
+        self._set_event_buttons(False)
+
+        thread = threading.Thread(target=self._play_macro_thread, args=(schedule, loops), daemon=True)
+        thread.start()
+
+    def _compile_schedule(self, speed: float) -> tuple:
+        """
+        Build the playback schedule from self.events as parallel sequences.
+
+        Returns (waits, actions, counts), one slot per schedule entry.
+
+        Waits are integer nanoseconds, already divided by speed, so summing
+        them into deadlines is exact. Each action is a zero-argument callable
+        with everything pre-bound: the prebuilt click buffer, or the decoded
+        key. The playback loop just waits and calls it. Events that cannot be
+        played pass their wait on to the next one.
+
+        Runs of identical consecutive events (same action and same wait, e.g.
+        a long series of clicks on one spot) are stored once with a repeat
+        count.
+        """
+        waits = array("q")
+        actions = []
+        counts = array("I")
+        # Actions are shared by equal events, so runs compare by identity
+        clicks = {}
+        keys = {}
+        max_wait = round(MAX_DELAY * 1e9)
+        carry = 0
+        for ev in self.events:
+            # Clamped so the nanosecond count fits the array and a timed wait;
+            # "not > 0" also plays a NaN delay as 0
+            delay = ev.delay_before / speed
+            wait = carry
+            if delay > 0:
+                wait = min(wait + round(min(delay, MAX_DELAY) * 1e9), max_wait)
+            action = None
+            if ev.type == "mouse_click" and ev.x is not None and ev.y is not None:
+                action = clicks.get((ev.x, ev.y))
+                if action is None:
+                    action = clicks[(ev.x, ev.y)] = functools.partial(
+                        _send_click, _compile_click(ev.x, ev.y)
+                    )
+            elif ev.type in ("key_down", "key_up") and ev.key is not None:
+                cache_key = (ev.key, ev.type)
+                if cache_key in keys:
+                    action = keys[cache_key]
+                else:
+                    action = keys[cache_key] = self._compile_key_action(ev.key, ev.type == "key_up")
+
+            if action is None:
+                carry = wait
+                continue
+            carry = 0
+            if counts and waits[-1] == wait and actions[-1] is action:
+                counts[-1] += 1
+                continue
+            waits.append(wait)
+            actions.append(action)
+            counts.append(1)
+
+        return waits, actions, counts
+
+    def _compile_key_action(self, key_str: str, up: bool):
+        """Playback action for a stored key press/release, or None if unknown."""
+        key = decode_key(key_str)
+        if key is None:
+            return None
+        send = self.kb_controller.release if up else self.kb_controller.press
+        return functools.partial(send, key)
+
+    def _play_macro_thread(self, schedule: tuple, loops: int) -> None:
+        """Run a schedule from _compile_schedule in a background thread."""
+        _set_fine_timer(True)
+        try:
+            self._run_schedule(schedule, loops)
+        finally:
+            _set_fine_timer(False)
+            # Always restore the UI, even if sending input failed
             self.root.after(0, self._playback_done)
-            return
 
-        cancel = False
+    def _run_schedule(self, schedule: tuple, loops: int) -> None:
+        """Play the schedule loops times; return as soon as Esc is pressed."""
+        # Bound once: locals are cheaper to reach than attributes/globals
+        now_ns = time.perf_counter_ns
+        cancel_wait = self._cancel_event.wait
+        cancelled = self._cancel_event.is_set
+        spin_ns = SPIN_NS
 
-        for _ in range(loops):
-            for ev in self.events:
-                if self.stop_playback:
-                    cancel = True
-                    break
-
-                total_wait = ev.delay_before / speed if ev.delay_before > 0 else 0.0
-
-                # Wait before event
-                if total_wait > 0:
-                    if total_wait <= SMALL_WAIT_THRESHOLD:
-                        time.sleep(total_wait)
-                    else:
-                        remaining = total_wait
-                        while remaining > 0:
-                            if self.stop_playback:
-                                cancel = True
-                                break
-                            chunk = MIN_SLEEP_CHUNK if remaining > MIN_SLEEP_CHUNK else remaining
-                            time.sleep(chunk)
-                            remaining -= chunk
-                        if cancel:
-                            break
-
-                if self.stop_playback or cancel:
-                    break
-
-                # Execute event
-                if ev.type == "mouse_click" and ev.x is not None and ev.y is not None:
-                    pyautogui.moveTo(ev.x, ev.y)
-                    pyautogui.click()
-                elif ev.type in ("key_down", "key_up") and ev.key is not None:
-                    k = decode_key(ev.key)
-                    if k is not None:
-                        if ev.type == "key_down":
-                            self.kb_controller.press(k)
-                        else:
-                            self.kb_controller.release(k)
-
-            if cancel or self.stop_playback:
-                break
+        # Each event is due at an absolute time, so late wakeups from sleep
+        # do not add up over a long macro.
+        deadline = now_ns()
 
-        self.root.after(0, self._playback_done)
+        for _ in range(loops):
+            for total_wait, action, count in zip(*schedule):
+                for _ in range(count):
+                    # The only cancel check per event: the wait returns early
+                    # as soon as Esc is pressed. OS sleeps overshoot by up to
+                    # a scheduler tick, so the last SPIN_NS is busy-waited.
+                    deadline += total_wait
+                    remaining = deadline - now_ns()
+                    if remaining > spin_ns:
+                        if cancel_wait((remaining - spin_ns) * 1e-9):
+                            return
+                    elif cancelled():
+                        return
+                    while now_ns() < deadline:
+                        pass
+
+                    action()
 
     def _playback_done(self) -> None:
         """Reset UI after playback completes or is cancelled."""
         self.is_playing = False
-        self.stop_playback = False
+        self._cancel_event.clear()
         self.update_status("Idle")
 
         self.record_button.config(text="Start Recording (F9)")
@@ -605,7 +1259,7 @@ class MouseKeyboardMacroGUI:
     # ---------- Editing / utility ----------
 
     def clear_events(self) -> None:
-        if self.is_recording or self.is_playing:
+        if self.is_recording or self._record_thread is not None or self.is_playing:
             messagebox.showwarning("Busy", "Stop recording or playback first.")
             return
 
@@ -615,7 +1269,7 @@ class MouseKeyboardMacroGUI:
         self._update_buttons_based_on_events()
 
     def delete_selected(self) -> None:
-        if self.is_recording or self.is_playing:
+        if self.is_recording or self._record_thread is not None or self.is_playing:
             messagebox.showwarning("Busy", "Stop recording or playback first.")
             return
 
@@ -628,11 +1282,13 @@ class MouseKeyboardMacroGUI:
             if 0 <= index < len(self.events):
                 del self.events[index]
 
-        self._refresh_listbox()
+        # Rows before the first deleted one are unchanged; later ones shift
+        # up and need their numbers redrawn.
+        self._refresh_listbox(start=selection[0])
         self._update_buttons_based_on_events()
 
     def update_selected_delay(self) -> None:
-        if self.is_recording or self.is_playing:
+        if self.is_recording or self._record_thread is not None or self.is_playing:
             messagebox.showwarning("Busy", "Stop recording or playback first.")
             return
 
@@ -652,6 +1308,9 @@ class MouseKeyboardMacroGUI:
 
         try:
             new_delay = float(new_delay_str)
+            if not math.isfinite(new_delay):
+                messagebox.showwarning("Invalid delay", "Enter a valid number of seconds.")
+                return
             if new_delay < 0:
                 messagebox.showwarning("Invalid delay", "Delay cannot be negative.")
                 return
@@ -660,14 +1319,14 @@ class MouseKeyboardMacroGUI:
             return
 
         self.events[index].delay_before = new_delay
-        self._refresh_listbox()
+        self._update_listbox_row(index)
         self.listbox.selection_clear(0, tk.END)
         self.listbox.selection_set(index)
         self.listbox.activate(index)
 
     def add_delay_to_selected(self) -> None:
         """Add a positive or negative delay to all selected events."""
-        if self.is_recording or self.is_playing:
+        if self.is_recording or self._record_thread is not None or self.is_playing:
             messagebox.showwarning("Busy", "Stop recording or playback first.")
             return
 
@@ -683,54 +1342,90 @@ class MouseKeyboardMacroGUI:
 
         try:
             delta = float(add_str)
+            if not math.isfinite(delta):
+                raise ValueError(add_str)
         except ValueError:
             messagebox.showwarning("Invalid delay", "Enter a valid number (e.g., 0.1 or -0.05).")
             return
 
+        changed = []
         for idx in selection:
             if 0 <= idx < len(self.events):
-                new_val = self.events[idx].delay_before + delta
-                if new_val < 0:
-                    new_val = 0.0
-                self.events[idx].delay_before = new_val
-
-        self._refresh_listbox()
-        self.listbox.selection_clear(0, tk.END)
-        for idx in selection:
-            if 0 <= idx < self.listbox.size():
-                self.listbox.selection_set(idx)
-        if selection:
-            self.listbox.activate(selection[0])
-
-    def _refresh_listbox(self) -> None:
-        self.listbox.delete(0, tk.END)
-        for i, ev in enumerate(self.events, start=1):
-            if ev.type == "mouse_click":
-                txt = f"{i}: MOUSE click at ({ev.x}, {ev.y})  delay={ev.delay_before:.3f}s"
-            elif ev.type == "key_down":
-                txt = f"{i}: KEY DOWN {ev.key}  delay={ev.delay_before:.3f}s"
-            elif ev.type == "key_up":
-                txt = f"{i}: KEY UP   {ev.key}  delay={ev.delay_before:.3f}s"
-            else:
-                txt = f"{i}: {ev.type}  delay={ev.delay_before:.3f}s"
-            self.listbox.insert(tk.END, txt)
+                old_val = self.events[idx].delay_before
+                new_val = max(old_val + delta, 0.0)
+                if new_val != old_val and math.isfinite(new_val):
+                    self.events[idx].delay_before = new_val
+                    changed.append(idx)
+
+        self._redraw_selected_rows(changed)
+        self.listbox.activate(selection[0])
+
+    # Listbox row text per event type, given the row number and the event
+    _ROW_FORMATTERS = {
+        "mouse_click": lambda i, ev: f"{i}: MOUSE click at ({ev.x}, {ev.y})  delay={ev.delay_before:.3f}s",
+        "key_down": lambda i, ev: f"{i}: KEY DOWN {ev.key}  delay={ev.delay_before:.3f}s",
+        "key_up": lambda i, ev: f"{i}: KEY UP   {ev.key}  delay={ev.delay_before:.3f}s",
+    }
+
+    def _format_row(self, i: int, ev: MacroEvent) -> str:
+        """Listbox text for event ev, shown as number i."""
+        formatter = self._ROW_FORMATTERS.get(ev.type)
+        if formatter is None:
+            return f"{i}: {ev.type}  delay={ev.delay_before:.3f}s"
+        return formatter(i, ev)
+
+    def _refresh_listbox(self, start: int = 0) -> None:
+        """Redraw listbox rows from index start to the end."""
+        self.listbox.delete(start, tk.END)
+        formatters = self._ROW_FORMATTERS
+        fallback = self._format_row
+        rows = [
+            formatters.get(ev.type, fallback)(i, ev)
+            for i, ev in enumerate(self.events[start:], start=start + 1)
+        ]
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+
+    def _redraw_selected_rows(self, indices: List[int]) -> None:
+        """
+        Redraw the given selected rows (ascending) and keep them selected.
+
+        Consecutive rows are replaced with one delete/insert pair per run.
+        Replacing rows drops their selection, so each run is reselected too.
+        """
+        start = 0
+        while start < len(indices):
+            end = start
+            while end + 1 < len(indices) and indices[end + 1] == indices[end] + 1:
+                end += 1
+            first, last = indices[start], indices[end]
+            rows = [self._format_row(i + 1, self.events[i]) for i in range(first, last + 1)]
+            self.listbox.delete(first, last)
+            self.listbox.insert(first, *rows)
+            self.listbox.selection_set(first, last)
+            start = end + 1
+
+    def _update_listbox_row(self, index: int) -> None:
+        """Redraw a single listbox row after its event was edited."""
+        self.listbox.delete(index)
+        self.listbox.insert(index, self._format_row(index + 1, self.events[index]))
 
     def _update_buttons_based_on_events(self) -> None:
         """Enable or disable buttons based on whether events exist."""
-        if self.events:
-            self.play_button.config(state=tk.NORMAL)
-            self.clear_button.config(state=tk.NORMAL)
-            self.delete_selected_button.config(state=tk.NORMAL)
-            self.update_delay_button.config(state=tk.NORMAL)
-            self.add_delay_button.config(state=tk.NORMAL)
-            self.save_button.config(state=tk.NORMAL)
-        else:
-            self.play_button.config(state=tk.DISABLED)
-            self.clear_button.config(state=tk.DISABLED)
-            self.delete_selected_button.config(state=tk.DISABLED)
-            self.update_delay_button.config(state=tk.DISABLED)
-            self.add_delay_button.config(state=tk.DISABLED)
-            self.save_button.config(state=tk.DISABLED)
+        self._set_event_buttons(bool(self.events))
+
+    def _set_event_buttons(self, enabled: bool) -> None:
+        """Set the state of the buttons that act on events, if it changed."""
+        if enabled == self._buttons_enabled:
+            return
+        state = tk.NORMAL if enabled else tk.DISABLED
+        self.play_button.config(state=state)
+        self.clear_button.config(state=state)
+        self.delete_selected_button.config(state=state)
+        self.update_delay_button.config(state=state)
+        self.add_delay_button.config(state=state)
+        self.save_button.config(state=state)
+        self._buttons_enabled = enabled
 
     def update_status(self, text: str) -> None:
         self.status_label.config(text=f"Status: {text}")
@@ -744,94 +1439,34 @@ class MouseKeyboardMacroGUI:
 
         path = filedialog.asksaveasfilename(
             title="Save Macro",
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            defaultextension=MSGPACK_EXT if msgpack is not None else ".json",
+            filetypes=_macro_filetypes()
         )
         if not path:
             return
 
         try:
-            data_events = []
-            for ev in self.events:
-                item = {
-                    "type": ev.type,
-                    "delay_before": ev.delay_before,
-                }
-                if ev.type == "mouse_click":
-                    item["x"] = ev.x
-                    item["y"] = ev.y
-                if ev.type in ("key_down", "key_up"):
-                    item["key"] = ev.key
-                data_events.append(item)
-
-            data = {
-                "version": MACRO_FILE_VERSION,
-                "events": data_events,
-            }
-
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            _, write_macro = _macro_format(path)
+            write_macro(path, self.events)
             messagebox.showinfo("Saved", f"Macro saved to:\n{path}")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save macro:\n{e}")
 
     def load_macro(self) -> None:
-        if self.is_recording or self.is_playing:
+        if self.is_recording or self._record_thread is not None or self.is_playing:
             messagebox.showwarning("Busy", "Stop recording or playback first.")
             return
 
         path = filedialog.askopenfilename(
             title="Load Macro",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=_macro_filetypes()
         )
         if not path:
             return
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            events_data = data.get("events")
-            if not isinstance(events_data, list):
-                raise ValueError("Invalid macro file format (missing 'events' list).")
-
-            loaded_events: List[MacroEvent] = []
-            for idx, item in enumerate(events_data):
-                try:
-                    ev_type = item.get("type", "mouse_click")
-                    delay = float(item.get("delay_before", 0.0))
-                    if delay < 0:
-                        delay = 0.0
-
-                    if ev_type == "mouse_click":
-                        x = int(item["x"])
-                        y = int(item["y"])
-                        loaded_events.append(
-                            MacroEvent(
-                                type="mouse_click",
-                                delay_before=delay,
-                                x=x,
-                                y=y,
-                                key=None,
-                            )
-                        )
-                    elif ev_type in ("key_down", "key_up"):
-                        key_str = str(item["key"])
-                        loaded_events.append(
-                            MacroEvent(
-                                type=ev_type,
-                                delay_before=delay,
-                                x=None,
-                                y=None,
-                                key=key_str,
-                            )
-                        )
-                    else:
-                        # Unknown type: skip
-                        continue
-
-                except Exception as inner_e:
-                    raise ValueError(f"Invalid event at index {idx}: {inner_e}") from inner_e
+            read_macro, _ = _macro_format(path)
+            loaded_events = read_macro(path)
 
             self.events = loaded_events
             self._refresh_listbox()